@@ -1,10 +1,20 @@
 import os
+import asyncio
+import hashlib
+import json
+from typing import List, Optional
+import aiohttp
+import httpx
+from cachetools import TTLCache
 from fastapi import FastAPI, HTTPException
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
 import openai
-import requests
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential_jitter
 
 app = FastAPI()
+app.add_middleware(GZipMiddleware, minimum_size=1024)  # Сжимаем крупные ответы, текст статьи хорошо сжимается
 
 # Получаем API ключи из переменных окружения
 openai.api_key = os.getenv("OPENAI_API_KEY")  # Устанавливаем ключ OpenAI из переменной окружения
@@ -19,11 +29,113 @@ if not openai.api_key or not currentsapi_key:
 openai.api_base = proxyapi_url  # Переопределяем базовый URL для всех запросов OpenAI
 openai.api_version = "2023-05-15"  # Указываем версию API (может требоваться для ProxyAPI)
 
+# Кэш новостей по нормализованной теме: новости меняются раз в несколько минут,
+# поэтому повторные запросы по популярным темам обслуживаются из памяти
+news_cache = TTLCache(maxsize=1024, ttl=300)  # Время жизни записи в секундах
+
+# Кэш готовых ответов /generate-post: повторный запрос по той же теме не тратит вызовы LLM
+response_cache = TTLCache(maxsize=512, ttl=1800)  # Время жизни записи в секундах
+# Генерации, выполняющиеся в данный момент, по ключу темы: одновременные запросы по одной теме
+# ждут одну и ту же задачу вместо запуска собственных вызовов LLM
+inflight_generations = {}
+
+NEWS_URL = "https://api.currentsapi.services/v1/latest-news"  # URL API для получения новостей
+# Постоянные параметры запроса новостей, в каждом запросе добавляются только ключевые слова
+NEWS_BASE_PARAMS = {
+    "language": "ru",  # Задаем язык новостей (русский), mожно изменить на: 'en' 'ru', 'fr', 'de' и другие поддерживаемые языки
+    "page_size": 5,  # Запрашиваем только те 5 новостей, которые попадают в промпт
+    "apiKey": currentsapi_key  # Передаем API ключ CurrentsAPI
+}
+
+# Максимальная длина блока новостей, который вставляется в промпт: меньше входных токенов —
+# быстрее и дешевле ответ модели
+NEWS_MAX_CHARS = 800
+
+# Требования к статье не меняются от запроса к запросу, поэтому собираются один раз при импорте
+POST_REQUIREMENTS = (
+    "Статья должна быть:\n"
+    "1. Информативной и логичной\n"
+    "2. Содержать не менее 1500 символов\n"
+    "3. Иметь четкую структуру с подзаголовками\n"
+    "4. Включать анализ текущих трендов\n"
+    "5. Иметь вступление, основную часть и заключение\n"
+    "6. Включать примеры из актуальных новостей\n"
+    "7. Каждый абзац должен быть не менее 3-4 предложений\n"
+    "8. Текст должен быть легким для восприятия и содержательным"
+)
+
+# Шаблоны промптов собираются один раз при импорте, в запросе подставляются только тема и новости
+TITLE_META_PROMPT = (
+    "Придумайте заголовок и мета-описание для статьи на тему '{topic}'. "
+    "Верните JSON с полями title (привлекательный и точный заголовок до 60 токенов, ясно передающий суть темы) "
+    "и meta_description (полное и информативное мета-описание до 120 токенов с основными ключевыми словами)."
+)
+POST_PROMPT = "Напишите подробную статью на тему '{topic}', используя последние новости:\n{news}.\n" + POST_REQUIREMENTS
+# Объединённый промпт строится из промпта статьи, чтобы потоковая и однократная генерация не расходились
+CONTENT_PROMPT = POST_PROMPT + (
+    "\nВерните JSON с полями title (привлекательный и точный заголовок до 60 токенов), "
+    "meta_description (информативное мета-описание до 120 токенов с основными ключевыми словами) "
+    "и post_content (текст статьи с подзаголовками)."
+)
+
+# Лимит токенов на ответ с заголовком, описанием и статьёй; если ответ обрезан по лимиту,
+# JSON получается незавершённым, и запрос повторяется один раз с увеличенным лимитом
+CONTENT_MAX_TOKENS = 1700
+CONTENT_RETRY_MAX_TOKENS = 3000
+# Таймауты HTTP-запроса к OpenAI в секундах (openai 0.27 ограничивает запрос только параметром request_timeout,
+# параметр timeout влияет лишь на ожидание «прогрева» модели); повтор с большим лимитом токенов генерируется дольше
+CONTENT_REQUEST_TIMEOUT = 30
+CONTENT_RETRY_REQUEST_TIMEOUT = 60
+# Таймаут остальных запросов к OpenAI; для потоков это пара (подключение, весь ответ целиком),
+# потому что общий таймаут aiohttp распространяется и на чтение всего потока токенов
+OPENAI_REQUEST_TIMEOUT = 15
+OPENAI_STREAM_REQUEST_TIMEOUT = (5, 90)
+
+# Число процессов-воркеров Uvicorn. Семафоры ниже действуют внутри одного процесса, поэтому общие
+# лимиты делятся между воркерами; при запуске не через __main__ WEB_CONCURRENCY должен совпадать с --workers
+WORKERS = int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1))
+
+def per_worker(total: int):
+    """
+    Возвращает долю общего лимита, приходящуюся на один воркер (не меньше 1).
+    """
+    return max(1, total // WORKERS)
+
+# Ограничение числа одновременных запросов к OpenAI, чтобы не упираться в лимиты ProxyAPI (ошибки 429).
+# OPENAI_CONCURRENCY задаёт лимит на весь сервис, каждый воркер получает свою долю
+openai_semaphore = asyncio.Semaphore(per_worker(int(os.getenv("OPENAI_CONCURRENCY", 32))))
+
+# Ограничение числа одновременно обрабатываемых запросов: при перегрузке быстрее ответить 503,
+# чем заставлять всех клиентов ждать таймаута. MAX_INFLIGHT_REQUESTS — лимит на весь сервис
+admission_semaphore = asyncio.Semaphore(per_worker(int(os.getenv("MAX_INFLIGHT_REQUESTS", 150))))
+# Лимит одновременных соединений Uvicorn на весь сервис; Uvicorn применяет его в каждом воркере отдельно
+MAX_CONNECTIONS = int(os.getenv("MAX_CONNECTIONS", 200))
+ADMISSION_TIMEOUT = 0.05  # Время ожидания свободного слота в секундах
+ADMISSION_EXEMPT_PATHS = ("/", "/heartbeat")  # Эндпоинты проверки работоспособности не ограничиваются
+
 class Topic(BaseModel):
     topic: str  # Модель данных для получения темы в запросе
 
+# Модели ответов: по ним FastAPI сериализует ответ напрямую через Pydantic, без промежуточного json
+class PostContent(BaseModel):
+    title: str  # Заголовок статьи
+    meta_description: str  # Мета-описание статьи
+    post_content: str  # Текст статьи
+
+class BatchItem(BaseModel):
+    topic: Optional[str] = None  # Тема из исходного запроса
+    title: Optional[str] = None
+    meta_description: Optional[str] = None
+    post_content: Optional[str] = None
+    error: Optional[str] = None  # Описание ошибки, если контент для темы не получен
+
+class BatchStatus(BaseModel):
+    batch_id: Optional[str]  # id пакета в Batch API
+    status: str  # Статус пакета
+    results: Optional[List[BatchItem]] = None  # Результаты по темам, появляются после завершения пакета
+
 # Функция для получения последних новостей на заданную тему
-def get_recent_news(topic: str):
+async def get_recent_news(topic: str):
     """
     Получает последние новости по заданной теме через CurrentsAPI.
     
@@ -33,13 +145,12 @@ def get_recent_news(topic: str):
     Returns:
         str: Строка с заголовками новостей, разделенными переносами строк
     """
-    url = "https://api.currentsapi.services/v1/latest-news"  # URL API для получения новостей
-    params = {
-        "language": "ru",  # Задаем язык новостей (английский), mожно изменить на: 'en' 'ru', 'fr', 'de' и другие поддерживаемые языки
-        "АСУ ТП": topic,  # Ключевые слова для поиска новостей
-        "apiKey": currentsapi_key  # Передаем API ключ CurrentsAPI
-    }
-    response = requests.get(url, params=params)  # Выполняем GET-запрос к API
+    cache_key = topic.strip().lower()  # Нормализуем тему, чтобы "AI" и " ai " попадали в одну запись
+    if cache_key in news_cache:
+        return news_cache[cache_key]
+
+    # Выполняем асинхронный GET-запрос к API, добавляя к постоянным параметрам ключевые слова
+    response = await app.state.http.get(NEWS_URL, params={**NEWS_BASE_PARAMS, "keywords": topic})
     
     if response.status_code != 200:
         # Если статус код не 200, выбрасываем исключение с подробностями ошибки
@@ -48,13 +159,212 @@ def get_recent_news(topic: str):
     # Извлекаем новости из ответа, если они есть
     news_data = response.json().get("news", [])
     if not news_data:
-        return "Свежих новостей не найдено."  # Сообщение, если новости отсутствуют
+        recent_news = "Свежих новостей не найдено."  # Сообщение, если новости отсутствуют
+    else:
+        # Заголовки первых 5 новостей, разделенные переносами строк, можно установить больше или меньше
+        # Обрезаем блок до NEWS_MAX_CHARS, чтобы не раздувать промпт статьи
+        recent_news = "\n".join([article["title"] for article in news_data[:5]])[:NEWS_MAX_CHARS]
+
+    news_cache[cache_key] = recent_news
+    return recent_news
+
+class AdmissionControlMiddleware:
+    """
+    ASGI-middleware, отклоняющий запрос с кодом 503, если свободный слот не освободился за ADMISSION_TIMEOUT.
+    Слот удерживается до конца отправки тела ответа, поэтому потоковые ответы тоже учитываются.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        # Проверки работоспособности не ограничиваем, чтобы платформа не перезапускала живой сервис под нагрузкой
+        if scope["type"] != "http" or scope["path"] in ADMISSION_EXEMPT_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            await asyncio.wait_for(admission_semaphore.acquire(), timeout=ADMISSION_TIMEOUT)
+        except asyncio.TimeoutError:
+            response = JSONResponse(status_code=503, content={"detail": "Сервис перегружен, повторите запрос позже"})
+            await response(scope, receive, send)
+            return
+        try:
+            # Приложение возвращает управление только после отправки последней части тела ответа
+            await self.app(scope, receive, send)
+        finally:
+            admission_semaphore.release()
+
+app.add_middleware(AdmissionControlMiddleware)
+
+@app.on_event("startup")
+async def startup_event():
+    """
+    Создаёт общие HTTP-сессии: aiohttp для запросов к OpenAI и httpx для Currents API и Batch API.
+    """
+    # Сессию для OpenAI храним в app.state: openai.aiosession — это ContextVar, и значение,
+    # установленное здесь, видно только задаче запуска приложения, а не обработчикам запросов
+    app.state.openai_session = aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=100, ttl_dns_cache=300)  # Пул соединений к ProxyAPI и кэш DNS на 5 минут
+    )
+    # Общий асинхронный клиент держит keep-alive соединения, чтобы не тратить время
+    # на TCP/TLS-рукопожатие при каждом запросе и не блокировать цикл событий
+    app.state.http = httpx.AsyncClient(
+        http2=True,  # Мультиплексируем запросы в одном соединении
+        timeout=httpx.Timeout(10.0, connect=2.0),  # Общий таймаут и отдельный таймаут на установку соединения
+        limits=httpx.Limits(max_keepalive_connections=50, max_connections=100)  # Размер пула соединений
+    )
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """
+    Закрывает общие HTTP-сессии при остановке приложения.
+    """
+    await app.state.openai_session.close()
+    await app.state.http.aclose()
+
+# Параметры запросов к модели вынесены в отдельные функции, чтобы одинаково
+# использовать их и в обычной генерации, и в пакетной обработке через Batch API
+def content_request(topic: str, recent_news: str, max_tokens: int = CONTENT_MAX_TOKENS):
+    """
+    Формирует параметры запроса на генерацию заголовка, мета-описания и текста статьи одним вызовом.
+    Общий контекст (тема и новости) передаётся модели один раз, ответ приходит в виде JSON.
+    """
+    return {
+        "model": "gpt-4o-mini",  # Используем модель GPT-4o-mini (через ProxyAPI может быть доступна другая версия)
+        "messages": [{
+            "role": "user", 
+            "content": CONTENT_PROMPT.format(topic=topic, news=recent_news)
+        }],
+        "max_tokens": max_tokens,  # Лимит токенов на статью вместе с заголовком и описанием
+        "temperature": 0.5,
+        "presence_penalty": 0.6,  # Штраф за повторение фраз
+        "frequency_penalty": 0.6,
+        "response_format": {"type": "json_object"},  # Гарантирует корректный JSON в ответе
+    }
+
+def parse_content(content: str):
+    """
+    Извлекает заголовок, мета-описание и текст статьи из JSON-ответа модели.
+    
+    Returns:
+        dict: Словарь сгенерированного контента (title, meta_description, post_content)
+    """
+    data = json.loads(content)
+    return {
+        "title": data["title"].strip(),
+        "meta_description": data["meta_description"].strip(),
+        "post_content": data["post_content"].strip()
+    }
+
+# Заголовок с описанием и текст статьи отдельными запросами нужны для потоковой генерации,
+# где текст статьи передаётся клиенту по мере поступления токенов
+def title_meta_request(topic: str):
+    """
+    Формирует параметры запроса на генерацию заголовка и мета-описания статьи одним вызовом.
+    Модель возвращает JSON с полями title и meta_description.
+    """
+    return {
+        "model": "gpt-4o-mini",  # Используем модель GPT-4o-mini (через ProxyAPI может быть доступна другая версия)
+        "messages": [{
+            "role": "user", 
+            "content": TITLE_META_PROMPT.format(topic=topic)
+        }],
+        "max_tokens": 200,  # Хватает на заголовок и описание вместе с JSON-разметкой
+        "temperature": 0.5,  # Умеренная случайность
+        "response_format": {"type": "json_object"},  # Гарантирует корректный JSON в ответе
+    }
+
+def parse_title_meta(content: str):
+    """
+    Извлекает заголовок и мета-описание из JSON-ответа модели.
     
-    # Возвращаем заголовки первых 5 новостей, разделенных переносами строк, можно установить больше или меньше
-    return "\n".join([article["title"] for article in news_data[:5]])
+    Returns:
+        tuple: Заголовок и мета-описание
+    """
+    data = json.loads(content)
+    return data["title"].strip(), data["meta_description"].strip()
+
+def post_request(topic: str, recent_news: str):
+    """
+    Формирует параметры запроса на генерацию полного текста статьи.
+    """
+    return {
+        "model": "gpt-4o-mini",
+        "messages": [{
+            "role": "user", 
+            "content": POST_PROMPT.format(topic=topic, news=recent_news)
+        }],
+        "max_tokens": 1500,  # Лимит токенов для развернутого текста
+        "temperature": 0.5,
+        "presence_penalty": 0.6,  # Штраф за повторение фраз
+        "frequency_penalty": 0.6,
+        "response_format": {"type": "text"},
+    }
+
+async def openai_acreate(**kwargs):
+    """
+    Выполняет запрос к ChatCompletion через общую aiohttp-сессию из app.state.
+    Сессия привязывается к openai.aiosession в текущей задаче, иначе openai открывает новую на каждый вызов.
+    """
+    openai.aiosession.set(app.state.openai_session)
+    return await openai.ChatCompletion.acreate(**kwargs)
+
+# Повтор временных ошибок OpenAI с экспоненциальной паузой
+openai_retry = retry(
+    stop=stop_after_attempt(4),  # Не более 4 попыток
+    wait=wait_exponential_jitter(initial=1, max=15),  # Экспоненциальная пауза со случайным разбросом
+    retry=retry_if_exception_type((
+        openai.error.RateLimitError,
+        openai.error.APIConnectionError,
+        openai.error.ServiceUnavailableError
+    )),
+    reraise=True  # После последней попытки пробрасываем исходную ошибку
+)
+
+@openai_retry
+async def chat_completion(**kwargs):
+    """
+    Выполняет запрос к ChatCompletion с ограничением параллельности и повтором временных ошибок.
+    Слот openai_semaphore занимается на время одной попытки и освобождается на паузу между повторами.
+    """
+    kwargs.setdefault("request_timeout", OPENAI_REQUEST_TIMEOUT)
+    async with openai_semaphore:
+        return await openai_acreate(**kwargs)
+
+@openai_retry
+async def open_chat_stream(**kwargs):
+    """
+    Открывает потоковый запрос к ChatCompletion с повтором временных ошибок.
+    При успехе слот openai_semaphore остаётся занятым и освобождается после закрытия потока,
+    при ошибке попытки — сразу, чтобы не удерживать его на паузу между повторами.
+    """
+    kwargs.setdefault("request_timeout", OPENAI_STREAM_REQUEST_TIMEOUT)
+    await openai_semaphore.acquire()
+    try:
+        return await openai_acreate(**kwargs, stream=True)
+    except BaseException:
+        openai_semaphore.release()
+        raise
+
+async def chat_completion_stream(**kwargs):
+    """
+    Отдаёт части потокового ответа ChatCompletion.
+    Слот openai_semaphore удерживается, пока поток не прочитан до конца или не закрыт,
+    поэтому потоковая генерация учитывается в лимите OPENAI_CONCURRENCY.
+    """
+    stream = await open_chat_stream(**kwargs)
+    try:
+        async for chunk in stream:
+            yield chunk
+    finally:
+        try:
+            await stream.aclose()
+        finally:
+            openai_semaphore.release()
 
 # Функция для генерации контента на основе темы и новостей
-def generate_content(topic: str):
+async def generate_content(topic: str):
     """
     Генерирует контент (заголовок, описание и текст статьи) по заданной теме.
     
@@ -64,73 +374,234 @@ def generate_content(topic: str):
     Returns:
         dict: Словарь сгенерированного контента (title, meta_description, post_content)
     """
-    recent_news = get_recent_news(topic)  # Получаем последние новости по теме
-
     try:
-        # Генерация заголовка для статьи через ProxyAPI
-        title = openai.ChatCompletion.create(
-            model="gpt-4o-mini",  # Используем модель GPT-4o-mini (через ProxyAPI может быть доступна другая версия)
-            messages=[{
-                "role": "user", 
-                "content": f"Придумайте привлекательный и точный заголовок для статьи на тему '{topic}', с учётом актуальных новостей:\n{recent_news}. Заголовок должен быть интересным и ясно передавать суть темы."
-            }],
-            max_tokens=30,  # Ограничиваем длину ответа
-            temperature=0.5,  # Умеренная случайность
-            stop=["\n"],  # Прерывание на новой строке
-            timeout=15  # Таймаут запроса в секундах
-        ).choices[0].message.content.strip()
-
-        # Генерация мета-описания для статьи
-        meta_description = openai.ChatCompletion.create(
-            model="gpt-4o-mini",
-            messages=[{
-                "role": "user", 
-                "content": f"Напишите мета-описание для статьи с заголовком: '{title}'. Оно должно быть полным, информативным и содержать основные ключевые слова."
-            }],
-            max_tokens=20,  # Увеличиваем лимит токенов для полного ответа
-            temperature=0.5,
-            stop=["."],
-            timeout=15
-        ).choices[0].message.content.strip()
-
-        # Генерация полного контента статьи
-        post_content = openai.ChatCompletion.create(
-            model="gpt-4o-mini",
-            messages=[{
-                "role": "user", 
-                "content": f"""Напишите подробную статью на тему '{topic}', используя последние новости:\n{recent_news}. 
-                Статья должна быть:
-                1. Информативной и логичной
-                2. Содержать не менее 1500 символов
-                3. Иметь четкую структуру с подзаголовками
-                4. Включать анализ текущих трендов
-                5. Иметь вступление, основную часть и заключение
-                6. Включать примеры из актуальных новостей
-                7. Каждый абзац должен быть не менее 3-4 предложений
-                8. Текст должен быть легким для восприятия и содержательным"""
-            }],
-            max_tokens=1500,  # Лимит токенов для развернутого текста
-            temperature=0.5,
-            presence_penalty=0.6,  # Штраф за повторение фраз
-            frequency_penalty=0.6,
-            timeout=30  # Увеличенный таймаут для длинного контента
-        ).choices[0].message.content.strip()
-
-        # Возвращаем сгенерированный контент
-        return {
-            "title": title,
-            "meta_description": meta_description,
-            "post_content": post_content
-        }
+        recent_news = await get_recent_news(topic)  # Получаем последние новости по теме
+
+        # Заголовок, мета-описание и текст статьи генерируются одним вызовом через ProxyAPI
+        response = await chat_completion(**content_request(topic, recent_news), request_timeout=CONTENT_REQUEST_TIMEOUT)
+        if response.choices[0].finish_reason == "length":
+            # Ответ обрезан по лимиту токенов, и JSON не завершён — повторяем с увеличенным лимитом
+            response = await chat_completion(
+                **content_request(topic, recent_news, max_tokens=CONTENT_RETRY_MAX_TOKENS),
+                request_timeout=CONTENT_RETRY_REQUEST_TIMEOUT
+            )
+            if response.choices[0].finish_reason == "length":
+                raise HTTPException(status_code=502, detail="Ответ модели обрезан по лимиту токенов")
+
+        try:
+            return parse_content(response.choices[0].message.content)
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            raise HTTPException(status_code=502, detail=f"Некорректный ответ модели: {str(e)}")
     
-    except requests.exceptions.Timeout:
+    except HTTPException:
+        # Ошибки получения новостей уже содержат нужный статус и описание
+        raise
+    except (openai.error.Timeout, httpx.TimeoutException):
         # Обработка ошибки таймаута
         raise HTTPException(status_code=504, detail="Превышено время ожидания ответа от ProxyAPI")
     except Exception as e:
         # Обрабатываем другие ошибки генерации
         raise HTTPException(status_code=500, detail=f"Ошибка при генерации контента: {str(e)}")
 
-@app.post("/generate-post")
+# Статусы пакета, после которых его состояние больше не меняется
+BATCH_FINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+async def batch_api(method: str, path: str, **kwargs):
+    """
+    Выполняет запрос к Files/Batches API через ProxyAPI и проверяет код ответа.
+    """
+    response = await app.state.http.request(
+        method,
+        f"{proxyapi_url}{path}",
+        headers={"Authorization": f"Bearer {openai.api_key}"},
+        **kwargs
+    )
+    if response.status_code == 404:
+        raise HTTPException(status_code=404, detail="Пакет или файл не найден")
+    response.raise_for_status()
+    return response
+
+async def submit_batch(requests_by_id: dict):
+    """
+    Отправляет набор запросов к модели в OpenAI Batch API, не дожидаясь их выполнения.
+    
+    Args:
+        requests_by_id (dict): Параметры запросов к /v1/chat/completions по custom_id
+        
+    Returns:
+        dict: Описание созданного пакета (id, status и другие поля Batch API)
+    """
+    # Упаковываем запросы в JSONL и загружаем его как файл с назначением "batch"
+    batch_input = "\n".join(
+        json.dumps({"custom_id": custom_id, "method": "POST", "url": "/v1/chat/completions", "body": body}, ensure_ascii=False)
+        for custom_id, body in requests_by_id.items()
+    )
+    response = await batch_api(
+        "POST", "/files",
+        data={"purpose": "batch"},
+        files={"file": ("batch.jsonl", batch_input.encode())}
+    )
+    input_file_id = response.json()["id"]
+
+    response = await batch_api(
+        "POST", "/batches",
+        json={
+            "input_file_id": input_file_id,
+            "endpoint": "/v1/chat/completions",
+            "completion_window": "24h"
+        }
+    )
+    return response.json()
+
+async def read_batch_file(file_id: str):
+    """
+    Скачивает JSONL-файл результатов или ошибок пакета и возвращает его строки в виде словарей.
+    """
+    response = await batch_api("GET", f"/files/{file_id}/content")
+    return [json.loads(line) for line in response.text.splitlines() if line.strip()]
+
+def batch_item_result(item: dict):
+    """
+    Преобразует строку результата Batch API в контент статьи или описание ошибки для одной темы.
+    """
+    if item.get("error"):
+        return {"error": f"Ошибка при генерации контента: {item['error']}"}
+    response = item["response"]
+    if response["status_code"] != 200:
+        return {"error": f"Ошибка при генерации контента: {response['body']}"}
+    choice = response["body"]["choices"][0]
+    if choice.get("finish_reason") == "length":
+        return {"error": "Ответ модели обрезан по лимиту токенов"}
+    try:
+        return parse_content(choice["message"]["content"])
+    except (ValueError, KeyError, TypeError, AttributeError) as e:
+        return {"error": f"Некорректный ответ модели: {str(e)}"}
+
+async def generate_content_batch(topics: list):
+    """
+    Ставит генерацию контента для нескольких тем в очередь OpenAI Batch API.
+    Дешевле обычной генерации, но результат может готовиться до 24 часов.
+    
+    Args:
+        topics (list): Список тем для генерации контента
+        
+    Returns:
+        dict: Описание созданного пакета
+    """
+    news = await asyncio.gather(*(get_recent_news(topic) for topic in topics))
+
+    # Тема хранится в custom_id, чтобы при получении результатов знать порядок и ключ кэша
+    return await submit_batch({
+        f"{index}:{topic}": content_request(topic, recent_news)
+        for index, (topic, recent_news) in enumerate(zip(topics, news))
+    })
+
+async def collect_batch_results(batch: dict):
+    """
+    Собирает результаты завершённого пакета по темам: контент статьи или ошибку для каждой темы.
+    
+    Args:
+        batch (dict): Описание пакета из Batch API
+        
+    Returns:
+        list: Результаты в порядке тем исходного запроса
+    """
+    # Если все запросы пакета завершились ошибкой, output_file_id пуст, и строки есть только в error_file_id
+    items = []
+    for file_id in (batch.get("output_file_id"), batch.get("error_file_id")):
+        if file_id:
+            items.extend(await read_batch_file(file_id))
+
+    results = {}
+    for item in items:
+        index, topic = item["custom_id"].split(":", 1)
+        results[int(index)] = {"topic": topic, **batch_item_result(item)}
+
+    total = max([batch.get("request_counts", {}).get("total", 0), *(index + 1 for index in results)])
+    missing = {"error": f"Результат не получен, статус пакета: {batch['status']}"}
+    return [results.get(index, missing) for index in range(total)]
+
+def response_cache_key(topic: str):
+    """
+    Возвращает ключ кэша ответов для нормализованной темы.
+    """
+    return hashlib.blake2b(topic.strip().lower().encode()).hexdigest()
+
+def sse_event(data: dict):
+    """
+    Упаковывает данные в кадр Server-Sent Events.
+    """
+    return f"data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+async def stream_content(topic: str):
+    """
+    Генерирует контент по теме и отдаёт его частями в формате Server-Sent Events.
+    Сначала отправляются заголовок и мета-описание, затем текст статьи по мере генерации.
+    
+    Args:
+        topic (str): Тема для генерации контента
+        
+    Yields:
+        str: Кадры SSE с полями title, meta_description, delta, done или error
+    """
+    cache_key = response_cache_key(topic)
+    if cache_key in response_cache:
+        cached = response_cache[cache_key]
+        yield sse_event({"title": cached["title"]})
+        yield sse_event({"meta_description": cached["meta_description"]})
+        yield sse_event({"delta": cached["post_content"]})
+        yield sse_event({"done": True})
+        return
+
+    news_task = asyncio.create_task(get_recent_news(topic))
+    title_meta_task = asyncio.create_task(
+        chat_completion(**title_meta_request(topic))
+    )
+    post_stream = None
+    try:
+        recent_news = await news_task
+        title, meta_description = parse_title_meta((await title_meta_task).choices[0].message.content)
+        yield sse_event({"title": title})
+        yield sse_event({"meta_description": meta_description})
+
+        # Поток статьи открываем только после успешной генерации заголовка: openai освобождает
+        # соединение потока лишь при его чтении, и неиспользованный поток занимал бы его до сборки мусора
+        post_stream = chat_completion_stream(**post_request(topic, recent_news))
+
+        post_parts = []
+        async for chunk in post_stream:
+            delta = chunk.choices[0].delta.get("content")
+            if delta:
+                post_parts.append(delta)
+                yield sse_event({"delta": delta})
+
+        # Полностью сгенерированный ответ сохраняем в общий кэш ответов
+        response_cache[cache_key] = {
+            "title": title,
+            "meta_description": meta_description,
+            "post_content": "".join(post_parts).strip()
+        }
+        yield sse_event({"done": True})
+    except Exception as e:
+        # Статус ответа уже отправлен клиенту, поэтому ошибка передаётся отдельным кадром
+        detail = e.detail if isinstance(e, HTTPException) else f"Ошибка при генерации контента: {str(e)}"
+        yield sse_event({"error": detail})
+    finally:
+        news_task.cancel()
+        title_meta_task.cancel()
+        if post_stream is not None:
+            # Если клиент отключился посреди статьи, закрываем поток и освобождаем соединение
+            await post_stream.aclose()
+
+async def generate_and_cache(cache_key: str, topic: str):
+    """
+    Генерирует контент по теме и сохраняет его в кэш ответов.
+    """
+    result = await generate_content(topic)
+    response_cache[cache_key] = result
+    return result
+
+@app.post("/generate-post", response_model=PostContent)
 async def generate_post_api(topic: Topic):
     """
     API endpoint для генерации контента по заданной теме.
@@ -141,17 +612,97 @@ async def generate_post_api(topic: Topic):
     Returns:
         dict: Сгенерированный контент или сообщение об ошибке
     """
-    return generate_content(topic.topic)
+    cache_key = response_cache_key(topic.topic)
+    if cache_key in response_cache:
+        return response_cache[cache_key]
+
+    task = inflight_generations.get(cache_key)
+    if task is None:
+        task = asyncio.create_task(generate_and_cache(cache_key, topic.topic))
+        inflight_generations[cache_key] = task
+        task.add_done_callback(lambda _: inflight_generations.pop(cache_key, None))
+    # shield не даёт отключившемуся клиенту отменить генерацию, которую ждут остальные
+    return await asyncio.shield(task)
+
+@app.post("/generate-post-stream")
+async def generate_post_stream_api(topic: Topic):
+    """
+    API endpoint для потоковой генерации контента через Server-Sent Events.
+    Клиент получает первые данные сразу после генерации заголовка, не дожидаясь всей статьи.
+    
+    Args:
+        topic (Topic): Объект с полем 'topic' содержащим тему для генерации
+        
+    Returns:
+        StreamingResponse: Поток кадров SSE
+    """
+    return StreamingResponse(stream_content(topic.topic), media_type="text/event-stream")
+
+@app.post("/generate-post-batch", response_model=BatchStatus, response_model_exclude_unset=True)
+async def generate_post_batch_api(topics: List[Topic]):
+    """
+    API endpoint для пакетной генерации контента по нескольким темам.
+    Ставит пакет в очередь OpenAI Batch API и сразу возвращает его id,
+    результаты забираются через GET /generate-post-batch/{batch_id}.
+    
+    Args:
+        topics (List[Topic]): Список объектов с полем 'topic'
+        
+    Returns:
+        dict: id и статус созданного пакета
+    """
+    if not topics:
+        return {"batch_id": None, "status": "completed", "results": []}
+
+    try:
+        batch = await generate_content_batch([topic.topic for topic in topics])
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Ошибка при пакетной генерации контента: {str(e)}")
+    return {"batch_id": batch["id"], "status": batch["status"]}
+
+@app.get("/generate-post-batch/{batch_id}", response_model=BatchStatus, response_model_exclude_unset=True)
+async def generate_post_batch_status_api(batch_id: str):
+    """
+    API endpoint для проверки статуса пакетной генерации и получения результатов.
+    
+    Args:
+        batch_id (str): id пакета, полученный от POST /generate-post-batch
+        
+    Returns:
+        dict: Статус пакета, а после его завершения — результат для каждой темы в порядке запроса
+            (контент статьи или поле error)
+    """
+    try:
+        batch = (await batch_api("GET", f"/batches/{batch_id}")).json()
+        if batch["status"] not in BATCH_FINAL_STATUSES:
+            return {"batch_id": batch_id, "status": batch["status"]}
+        results = await collect_batch_results(batch)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Ошибка при получении результатов пакета: {str(e)}")
+
+    # Готовые результаты сохраняем в кэш, чтобы /generate-post отдавал их сразу
+    for result in results:
+        if "error" not in result:
+            response_cache[response_cache_key(result["topic"])] = {
+                "title": result["title"],
+                "meta_description": result["meta_description"],
+                "post_content": result["post_content"]
+            }
+    return {"batch_id": batch_id, "status": batch["status"], "results": results}
 
 @app.get("/")
-async def root():
+async def root() -> dict:
     """
     Корневой эндпоинт для проверки работоспособности сервиса.
     """
     return {"message": "Служба запущена"}
 
 @app.get("/heartbeat")
-async def heartbeat_api():
+async def heartbeat_api() -> dict:
     """
     Эндпоинт проверки состояния сервиса (healthcheck).
     """
@@ -161,4 +712,15 @@ if __name__ == "__main__":
     import uvicorn
     # Запуск приложения с указанием порта
     port = int(os.getenv("PORT", 8000))  # Порт из переменной окружения или 8000 по умолчанию
-    uvicorn.run("app:app", host="0.0.0.0", port=port, reload=True)  # Добавлен reload для разработки
+    uvicorn.run(
+        "app:app",
+        host="0.0.0.0",
+        port=port,
+        workers=WORKERS,  # Количество процессов-воркеров, по умолчанию по числу ядер
+        loop="uvloop",  # Быстрый цикл событий на базе libuv
+        http="httptools",  # HTTP-парсер на C
+        log_level="info",
+        timeout_keep_alive=30,  # Время удержания keep-alive соединений с клиентами в секундах
+        limit_concurrency=per_worker(MAX_CONNECTIONS),  # Сверх этого числа соединений на воркер Uvicorn сразу отвечает 503
+        backlog=2048  # Размер очереди входящих соединений
+    )